@@ -0,0 +1,46 @@
+import os
+from dataclasses import dataclass, field, fields
+
+
+def _to_bool(value: str) -> bool:
+    return value.strip().lower() == 'true'
+
+
+def _env(name: str, default):
+    """A config field that can be overridden by the environment variable `name`"""
+    return field(default=default, metadata={'env': name})
+
+
+@dataclass(slots=True, frozen=True)
+class ServerConfig:
+    idrac_host: str = _env('IDRAC_HOST', 'local')
+    idrac_username: str = _env('IDRAC_USERNAME', 'root')
+    idrac_password: str = _env('IDRAC_PASSWORD', 'calvin')
+    fan_speed: int = _env('FAN_SPEED', 25)
+    fan_speed_max: int = _env('FAN_SPEED_MAX', 100)
+    cpu_temp_threshold: int = _env('CPU_TEMPERATURE_THRESHOLD', 60)
+    check_interval: int = _env('CHECK_INTERVAL', 15)
+    check_interval_min: int = _env('CHECK_INTERVAL_MIN', 5)
+    check_interval_max: int = _env('CHECK_INTERVAL_MAX', 60)
+    disable_pcie_cooling: bool = _env('DISABLE_THIRD_PARTY_PCIE_CARD_DELL_DEFAULT_COOLING_RESPONSE', False)
+    keep_pcie_state: bool = _env('KEEP_THIRD_PARTY_PCIE_CARD_COOLING_RESPONSE_STATE_ON_EXIT', False)
+    fan_rpm_min: int = _env('FAN_RPM_MIN', 2500)
+    fan_rpm_max: int = _env('FAN_RPM_MAX', 12000)
+    calibrate_fans: bool = _env('CALIBRATE_FANS', False)
+    enable_debug: bool = _env('ENABLE_DEBUG_OUTPUT', False)
+    enable_dynamic_updates: bool = _env('ENABLE_DYNAMIC_UPDATES', True)
+    junction_offset: int = _env('JUNCTION_OFFSET', 15)
+    status_socket: str = _env('STATUS_SOCKET', '/run/idrac_controller/status.sock')
+    sdr_cache_dir: str = _env('SDR_CACHE_DIR', '/var/cache/idrac_fan_controller')
+
+    @classmethod
+    def from_env(cls) -> 'ServerConfig':
+        """Build a config from the environment, falling back to the defaults above"""
+        parsers = {bool: _to_bool, int: int, str: str}
+        overrides = {}
+        for f in fields(cls):
+            value = os.environ.get(f.metadata['env'])
+            if value is not None:
+                overrides[f.name] = parsers[f.type](value)
+
+        return cls(**overrides)
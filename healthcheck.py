@@ -1,7 +1,11 @@
 import sys
-import os
-from typing import Dict, Any
-from pydrac import ServerConfig, DellServer
+sys.dont_write_bytecode = True  # the container filesystem may be read-only
+
+import json
+import socket
+import time
+from typing import Dict, Any, Optional
+from config import ServerConfig
 
 def check_temperatures(temps: Dict[str, Any], config: ServerConfig) -> tuple[bool, str]:
     """
@@ -21,30 +25,53 @@ def check_temperatures(temps: Dict[str, Any], config: ServerConfig) -> tuple[boo
     # than what we measure, we should trigger at 55°C measured temperature
     adjusted_threshold = config.cpu_temp_threshold - config.junction_offset
 
-    if temps['cpu1'] and temps['cpu1'] > adjusted_threshold:
-        return False, (f"CPU1 package temperature ({temps['cpu1']}°C) indicates junction "
-                      f"temperature may exceed threshold ({config.cpu_temp_threshold}°C)")
-    if temps['cpu2'] and temps['cpu2'] > adjusted_threshold:
-        return False, (f"CPU2 package temperature ({temps['cpu2']}°C) indicates junction "
+    hottest = max((cpu for cpu in ('cpu1', 'cpu2') if temps[cpu]), key=temps.get, default=None)
+    if hottest and temps[hottest] > adjusted_threshold:
+        return False, (f"{hottest.upper()} package temperature ({temps[hottest]}°C) indicates junction "
                       f"temperature may exceed threshold ({config.cpu_temp_threshold}°C)")
 
     return True, "Temperature checks passed"
 
+def read_status(config: ServerConfig) -> Optional[Dict[str, Any]]:
+    """
+    Ask the running controller for its latest readings.
+    Returns None if it isn't listening or hasn't finished a tick yet.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5)
+            sock.connect(config.status_socket)
+            with sock.makefile() as f:
+                return json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+
 def healthcheck() -> bool:
     try:
-        config = ServerConfig()
-        server = DellServer(config)
+        config = ServerConfig.from_env()
+
+        status = read_status(config)
+        if status is not None:
+            # the controller may back off up to check_interval_max between ticks
+            max_age = 2 * max(config.check_interval, config.check_interval_max)
+            age = time.time() - status['ts']
+            if age > max_age:
+                print(f"Controller status is stale ({int(age)}s old)", file=sys.stderr)
+                return False
+            temps = status['temps']
+        else:
+            # only pay for importing rich and friends when we have to talk to the BMC
+            from pydrac import DellServer
+
+            server = DellServer(config, minimal=True)
+            # a successful sensor read already proves IPMI is reachable
+            temps = server.read_temps_raw()
 
-        temps = server.get_temperatures()
         temps_ok, temp_message = check_temperatures(temps, config)
         if not temps_ok:
             print(f"Temperature check failed: {temp_message}", file=sys.stderr)
             return False
 
-        if not server._run_ipmitool('mc', 'info'):
-            print("IPMI communication check failed", file=sys.stderr)
-            return False
-
         return True
 
     except Exception as e:
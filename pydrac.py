@@ -1,55 +1,123 @@
 import os
+import csv
+import json
 import time
 import signal
-import sys
+import socket
+import atexit
+import contextlib
+import functools
+import itertools
+import shutil
 import subprocess
+import threading
 from datetime import datetime
 from typing import Optional
 import re
+import select
 
 from rich.console import Console
 from rich.table import Table
 from rich.live import Live
+from rich.style import Style
 from rich.text import Text
-from pydantic import BaseModel
-
-
-class ServerConfig(BaseModel):
-    idrac_host: str = os.getenv('IDRAC_HOST', 'local')
-    idrac_username: str = os.getenv('IDRAC_USERNAME', 'root')
-    idrac_password: str = os.getenv('IDRAC_PASSWORD', 'calvin')
-    fan_speed: int = int(os.getenv('FAN_SPEED', '25'))
-    fan_speed_max: int = int(os.getenv('FAN_SPEED_MAX', '100'))
-    cpu_temp_threshold: int = int(os.getenv('CPU_TEMPERATURE_THRESHOLD', '60'))
-    check_interval: int = int(os.getenv('CHECK_INTERVAL', '15'))
-    disable_pcie_cooling: bool = os.getenv('DISABLE_THIRD_PARTY_PCIE_CARD_DELL_DEFAULT_COOLING_RESPONSE', 'false').lower() == 'true'
-    keep_pcie_state: bool = os.getenv('KEEP_THIRD_PARTY_PCIE_CARD_COOLING_RESPONSE_STATE_ON_EXIT', 'false').lower() == 'true'
-    fan_rpm_min: int = int(os.getenv('FAN_RPM_MIN', '2500'))
-    fan_rpm_max: int = int(os.getenv('FAN_RPM_MAX', '12000'))
-    calibrate_fans: bool = os.getenv('CALIBRATE_FANS', 'false') == 'true'
-    enable_debug: bool = os.getenv('ENABLE_DEBUG_OUTPUT', 'false').lower() == 'true'
-    enable_dynamic_updates: bool = os.getenv('ENABLE_DYNAMIC_UPDATES', 'true').lower() == 'true'
-    junction_offset: int = int(os.getenv('JUNCTION_OFFSET', '15'))
+
+from config import ServerConfig
+
+IPMI_TIMEOUT = 30  # seconds to wait on the ipmitool shell before we consider it hung
+# stderr from ipmitool is usually just diagnostics, these mean the command itself didn't go through
+_IPMI_ERROR_MARKERS = ('unable to', 'invalid command', 'insufficient privilege', 'failed', 'error')
+
+# ipmitool sdr: name | sensor id | status | entity id | reading
+_SDR_TEMP_RE = re.compile(
+    r'^(?P<name>\S[^|]*?)\s*\|\s*(?P<sid>[0-9a-fA-F]+h)\s*\|\s*\S+\s*\|\s*(?P<eid>[\d.]+)\s*\|\s*(?P<reading>\d+)\s*degrees'
+)
+# "Processor 2 Temp", or "Processor Temp" when there's only one socket, or vendor names like "CPU1 Temp"
+_PROCESSOR_NAME_RE = re.compile(r'(?:processor|cpu)\s*(\d*)', re.IGNORECASE)
+_FAN_RE = re.compile(r'Fan(\d+) RPM\s+\|\s+\w+\s+\|\s+\w+\s+\|\s+[\d.]+\s+\|\s+(\d+)')
+_GEN_RE = re.compile(r'.*[RT]\s?[0-9][4-9]0.*')
+
+# IPMI entity 3 is the processor, the instance number tells us which socket
+_CPU_ENTITIES = {
+    '3.1': 'cpu1',
+    '3.2': 'cpu2',
+}
+
+_TEMP_SENSOR_NAMES = (
+    ('inlet', 'inlet'),
+    ('exhaust', 'exhaust'),
+)
+
+_FRU_FIELDS = {
+    'Board Mfg': 'manufacturer',
+    'Board Product': 'model',
+}
+
+_TABLE_COLUMNS = (
+    ("Time", "center"),
+    ("Inlet Temp", "right"),
+    ("CPU1 Temp", "right"),
+    ("CPU2 Temp", "right"),
+    ("Exhaust Temp", "right"),
+    ("Fan Profile", "left"),
+    ("Fan Speeds", "right"),
+)
+
+_STYLE_DIM = Style(dim=True)
+_STYLE_HOT = Style(color='red', bold=True)
+_STYLE_WARM = Style(color='yellow', bold=True)
+_STYLE_OK = Style(color='green')
+
+
+class IPMIError(Exception):
+    """An ipmitool command failed, or the ipmitool shell stopped responding"""
 
 
 class DellServer:
-    def __init__(self, config: ServerConfig):
+    def __init__(self, config: ServerConfig, *, minimal: bool = False):
+        """
+        `minimal` skips everything that isn't needed to read sensors (FRU lookup,
+        generation check, calibration, the status table), for one-shot callers
+        like the healthcheck. Warnings go to stderr in that mode.
+        """
         self.config = config
-        self.console = Console()
-        self.model, self.manufacturer = self._get_server_info()
-        self.is_gen14_or_newer = self._check_server_generation()
+        self.console = Console(stderr=minimal)
+        self._ipmi_proc: Optional[subprocess.Popen] = None
+        self._ipmi_lock = threading.RLock()
+        self._ipmi_sentinels = itertools.count()
+        atexit.register(self.close)
+        self._cache = {}
+        self._cache_ttl = self.config.check_interval / 2
+        self._sensor_backend = 'freeipmi' if shutil.which('ipmi-sensors') else 'ipmitool'
+        self._sdr_cache_dir: Optional[str] = None
+        if self._sensor_backend == 'freeipmi':
+            self._sdr_cache_dir = self._prepare_sdr_cache_dir()
+        # we read package temperatures, junction runs junction_offset°C hotter
+        self.adjusted_threshold = self.config.cpu_temp_threshold - self.config.junction_offset
+        self._sensor_map: dict[tuple[str, str], Optional[str]] = {}
         self.current_profile = "Initializing..."
         self.current_fan_speeds = []
+        self._last_commanded_speed: Optional[int] = None
+        self._last_cooling_mode: Optional[str] = None
+        self._skipped_speed_writes = 0
         self.fan_speed_ranges = {
             'min': self.config.fan_rpm_min,
             'max': self.config.fan_rpm_max,
         }
 
+        if minimal:
+            self.model, self.manufacturer = "Unknown Model", "Unknown Manufacturer"
+            self.is_gen14_or_newer: Optional[bool] = None  # unknown without the FRU lookup
+            return
+
+        self.model, self.manufacturer = self._get_server_info()
+        self.is_gen14_or_newer = self._check_server_generation(self.model)
+
         # make it optional if you already know your min/max
         if self.config.calibrate_fans:
             self.calibrate_fans()
 
-    def _run_ipmitool(self, *args) -> str:
+    def _ipmitool_base_cmd(self) -> list[str]:
         cmd = ['ipmitool']
 
         if self.config.idrac_host == 'local':
@@ -60,39 +128,236 @@ class DellServer:
                        '-U', self.config.idrac_username,
                        '-P', self.config.idrac_password])
 
+        return cmd
+
+    def _start_ipmi_shell(self) -> subprocess.Popen:
+        # ipmitool's shell uses readline, keep it from emitting terminal escapes
+        env = dict(os.environ, TERM='dumb')
+        return subprocess.Popen(
+            self._ipmitool_base_cmd() + ['shell'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+            env=env
+        )
+
+    @staticmethod
+    def _read_ipmi_stderr(proc: subprocess.Popen) -> list[str]:
+        """Collect whatever is already waiting on the shell's stderr, without blocking"""
+        fd = proc.stderr.fileno()
+        data = b''
+        while select.select([fd], [], [], 0)[0]:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            data += chunk
+
+        return [line.strip() for line in data.decode(errors='replace').splitlines() if line.strip()]
+
+    def _run_ipmitool(self, *args) -> str:
+        return self._run_ipmitool_batch(args)
+
+    def _run_ipmitool_batch(self, *commands: tuple[str, ...]) -> str:
+        """
+        Run commands through a persistent `ipmitool shell` session so we only
+        pay for process startup and session setup once, not on every call.
+        All commands in a batch share a single round trip to the shell.
+
+        Anything written to stderr is logged as a warning. Raises IPMIError if
+        the batch produced no output and stderr reports an error (e.g. a raw
+        write that wasn't accepted), or if the shell doesn't answer within
+        IPMI_TIMEOUT; the shell is restarted on the next call.
+        """
+        with self._ipmi_lock:
+            if self._ipmi_proc is None or self._ipmi_proc.poll() is not None:
+                self._ipmi_proc = self._start_ipmi_shell()
+            proc = self._ipmi_proc
+
+            # anything still sitting on stderr belongs to an earlier batch
+            for line in self._read_ipmi_stderr(proc):
+                self.console.print(f"[yellow]Warning: ipmitool: {line}[/yellow]")
+
+            lines = [' '.join(args) for args in commands]
+            sentinel = f"__pydrac_{next(self._ipmi_sentinels)}__"
+            echoed = set(lines) | {f"echo {sentinel}"}
+
+            try:
+                proc.stdin.write((''.join(f"{line}\n" for line in lines) + f"echo {sentinel}\n").encode())
+                proc.stdin.flush()
+                output, errors = self._read_ipmi_output(proc, sentinel, echoed)
+            except OSError as e:
+                self._stop_ipmi_shell(kill=True)
+                raise IPMIError(f"ipmitool shell failed: {e}") from e
+
+            result = '\n'.join(output).strip()
+            failed = not result and any(marker in line.lower() for line in errors for marker in _IPMI_ERROR_MARKERS)
+            if failed:
+                # the session may be broken (expired, BMC reset), start over with a fresh one
+                self._stop_ipmi_shell(kill=True)
+                raise IPMIError("; ".join(errors))
+
+            for line in errors:
+                self.console.print(f"[yellow]Warning: ipmitool: {line}[/yellow]")
+
+            return result
+
+    def _read_ipmi_output(self, proc: subprocess.Popen, sentinel: str, echoed: set[str]) -> tuple[list[str], list[str]]:
+        out_fd = proc.stdout.fileno()
+        err_fd = proc.stderr.fileno()
+        fds = [out_fd, err_fd]
+        deadline = time.monotonic() + IPMI_TIMEOUT
+        buffer = b''
+        output = []
+        errors = []
+
+        while True:
+            while b'\n' in buffer:
+                raw_line, buffer = buffer.split(b'\n', 1)
+                line = raw_line.decode(errors='replace').rstrip('\r')
+                # readline echoes the prompt (and sometimes the input) back to us
+                while line.startswith('ipmitool> '):
+                    line = line[len('ipmitool> '):]
+
+                if line == sentinel:
+                    # errors are written before the sentinel is echoed, so they're already in the pipe
+                    errors.extend(self._read_ipmi_stderr(proc))
+                    return output, errors
+                if line.strip() in echoed:
+                    continue
+                output.append(line)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise OSError(f"no response within {IPMI_TIMEOUT}s")
+
+            ready, _, _ = select.select(fds, [], [], remaining)
+            if err_fd in ready:
+                chunk = os.read(err_fd, 65536)
+                if chunk:
+                    errors.extend(line.strip() for line in chunk.decode(errors='replace').splitlines() if line.strip())
+                else:
+                    fds.remove(err_fd)
+            if out_fd in ready:
+                chunk = os.read(out_fd, 65536)
+                if not chunk:
+                    raise OSError("ipmitool shell exited unexpectedly")
+                buffer += chunk
+
+    def _stop_ipmi_shell(self, kill: bool = False):
+        proc, self._ipmi_proc = self._ipmi_proc, None
+        if proc is None:
+            return
+
+        try:
+            if kill:
+                proc.kill()
+            elif proc.poll() is None:
+                proc.stdin.write(b"exit\n")
+                proc.stdin.flush()
+            proc.wait(timeout=5)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            proc.kill()
+            proc.wait()
+
+    def close(self):
+        with self._ipmi_lock:
+            self._stop_ipmi_shell()
+
+    def _prepare_sdr_cache_dir(self) -> Optional[str]:
+        try:
+            os.makedirs(self.config.sdr_cache_dir, exist_ok=True)
+            return self.config.sdr_cache_dir
+        except OSError as e:
+            self.console.print(f"[yellow]Warning: Could not use SDR cache directory, using FreeIPMI's default: {e}[/yellow]")
+            return None
+
+    def _run_ipmi_sensors(self, *args) -> str:
+        cmd = ['ipmi-sensors']
+
+        if self.config.idrac_host != 'local':
+            cmd.extend(['-D', 'LAN_2_0',
+                       '-h', self.config.idrac_host,
+                       '-u', self.config.idrac_username,
+                       '-p', self.config.idrac_password])
+
+        # keep the SDR cache around so we don't walk the whole repository every call
+        if self._sdr_cache_dir:
+            cmd.extend(['--sdr-cache-directory', self._sdr_cache_dir])
+        cmd.append('--quiet-cache')
         cmd.extend(args)
 
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            result = subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=IPMI_TIMEOUT)
             return result.stdout.strip()
+        except (OSError, subprocess.TimeoutExpired) as e:
+            self.console.print(f"[red]ipmi-sensors failed: {e}[/red]")
+            return ""
+        except subprocess.CalledProcessError as e:
+            # only a stale SDR cache (firmware update, new hardware) is worth a rebuild,
+            # an unreachable BMC or bad credentials would just fail again, slower
+            if 'cache' not in e.stderr.lower():
+                self.console.print(f"[red]ipmi-sensors failed: {e.stderr.strip()}[/red]")
+                return ""
+
+        try:
+            result = subprocess.run(cmd + ['--sdr-cache-recreate'], capture_output=True, text=True, check=True,
+                                    timeout=IPMI_TIMEOUT)
+            return result.stdout.strip()
+        except (OSError, subprocess.TimeoutExpired) as e:
+            self.console.print(f"[red]ipmi-sensors failed: {e}[/red]")
+            return ""
         except subprocess.CalledProcessError as e:
-            self.console.print(f"[red]IPMI command failed: {e.stderr}[/red]")
+            self.console.print(f"[red]ipmi-sensors failed: {e.stderr.strip()}[/red]")
             return ""
 
     def _get_server_info(self) -> tuple[str, str]:
         try:
             fru_info = self._run_ipmitool('fru')
-            manufacturer = "Unknown Manufacturer"
-            model = "Unknown Model"
+            info = {
+                'manufacturer': "Unknown Manufacturer",
+                'model': "Unknown Model",
+            }
 
             for line in fru_info.splitlines():
-                if 'Board Mfg' in line:
-                    manufacturer = line.split(':', 1)[1].strip()
-                elif 'Board Product' in line:
-                    model = line.split(':', 1)[1].strip()
+                key, _, value = line.partition(':')
+                field = _FRU_FIELDS.get(key.strip())
+                if field:
+                    info[field] = value.strip()
 
-            return model, manufacturer
+            return info['model'], info['manufacturer']
         except Exception as e:
             self.console.print(f"[yellow]Warning: Could not get server info: {e}[/yellow]")
             return "Unknown Model", "Unknown Manufacturer"
 
-    def _check_server_generation(self) -> bool:
-        pattern = r'.*[RT]\s?[0-9][4-9]0.*'
-        return bool(re.match(pattern, self.model))
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def _check_server_generation(model: str) -> bool:
+        return bool(_GEN_RE.match(model))
+
+    def _cached(self, key: str, ttl: float, fn):
+        now = time.monotonic()
+        entry = self._cache.get(key)
+        if entry is not None and now - entry[0] < ttl:
+            return entry[1]
+
+        value = fn()
+        self._cache[key] = (now, value)
+        return value
+
+    def invalidate_cache(self):
+        """Force the next sensor read to go to the BMC"""
+        self._cache.clear()
 
     def get_temperatures(self) -> dict:
+        return self._cached('temperatures', self._cache_ttl, self.read_temps_raw)
+
+    def get_fan_speeds(self) -> dict:
+        return self._cached('fan_speeds', self._cache_ttl, self._read_fan_speeds)
+
+    def read_temps_raw(self) -> dict:
         """
-        Get temperature readings from IPMI.
+        Get temperature readings from IPMI, bypassing the cache.
         Note: CPU temperatures are package temperatures, not junction temperatures.
         Junction temperature is typically 10-20°C higher than package temperature.
         """
@@ -104,35 +369,24 @@ class DellServer:
         }
 
         try:
-            raw_data = self._run_ipmitool('sdr', 'type', 'temperature')
-            temp_data = [line for line in raw_data.splitlines() if 'degrees' in line]
-
-            # Parse CPU temperatures (lines containing '3.')
-            cpu_data = [line for line in temp_data if '3.' in line]
-            cpu_temps = []
-            for line in cpu_data:
-                temp_match = re.search(r'(\d{2})\s+degrees', line)
-                if temp_match:
-                    cpu_temps.append(int(temp_match.group(1)))
-
-            if len(cpu_temps) >= 1:
-                temps['cpu1'] = cpu_temps[0]
-            if len(cpu_temps) >= 2:
-                temps['cpu2'] = cpu_temps[1]
-
-            for line in temp_data:
-                if 'inlet' in line.lower():
-                    temp_match = re.search(r'(\d{2})\s+degrees', line)
-                    if temp_match:
-                        temps['inlet'] = int(temp_match.group(1))
-                elif 'exhaust' in line.lower():
-                    temp_match = re.search(r'(\d{2})\s+degrees', line)
-                    if temp_match:
-                        temps['exhaust'] = int(temp_match.group(1))
+            raw_data = ""
+            if self._sensor_backend == 'freeipmi':
+                raw_data = self._run_ipmi_sensors(
+                    '--comma-separated-output',
+                    '--no-header-output',
+                    '--entity-sensor-names',
+                    '-t', 'Temperature'
+                )
+                self._parse_freeipmi_temperatures(raw_data, temps)
+
+            # without a CPU reading we can't control anything, let ipmitool have a go
+            if not raw_data or (temps['cpu1'] is None and temps['cpu2'] is None):
+                raw_data = self._run_ipmitool('sdr', 'type', 'temperature')
+                self._parse_ipmitool_temperatures(raw_data, temps)
 
             if self.config.enable_debug:
                 self.console.print("[dim]Debug: Raw temperature data:[/dim]")
-                for line in temp_data:
+                for line in raw_data.splitlines():
                     self.console.print(f"[dim]{line}[/dim]")
 
                 if temps['cpu1']:
@@ -147,15 +401,84 @@ class DellServer:
 
         return temps
 
-    def use_automatic_cooling(self, enable: bool):
-        self._run_ipmitool('raw', '0x30', '0x30', '0x01', '0x01' if enable else '0x00')
+    def _sensor_key(self, source: str, sensor_id: str, name: str, entity_id: Optional[str] = None) -> Optional[str]:
+        """
+        Map a sensor to its key in the temps dict. Sensors are only classified
+        the first time we see them, after that it's a single dict lookup.
+        """
+        map_key = (source, sensor_id)
+        if map_key not in self._sensor_map:
+            if entity_id is None:
+                # FreeIPMI has no entity ID column, but --entity-sensor-names spells it out
+                processor = _PROCESSOR_NAME_RE.match(name)
+                entity_id = f"3.{processor.group(1) or 1}" if processor else None
+
+            key = _CPU_ENTITIES.get(entity_id)
+            if key is None:
+                low = name.lower()
+                key = next((k for substr, k in _TEMP_SENSOR_NAMES if substr in low), None)
+            self._sensor_map[map_key] = key
+
+        return self._sensor_map[map_key]
+
+    def _parse_freeipmi_temperatures(self, raw_data: str, temps: dict):
+        # ipmi-sensors CSV: ID,Name,Type,Reading,Units,Event
+        for row in csv.reader(raw_data.splitlines()):
+            if len(row) < 4:
+                continue
+
+            key = self._sensor_key('freeipmi', row[0], row[1])
+            if key is None:
+                continue
+            try:
+                temps[key] = int(float(row[3]))
+            except ValueError:
+                continue
 
-    def set_fan_speed(self, speed: int):
-        try:
-            self.use_automatic_cooling(False)
+    def _parse_ipmitool_temperatures(self, raw_data: str, temps: dict):
+        for line in raw_data.splitlines():
+            sensor = _SDR_TEMP_RE.match(line)
+            if not sensor:
+                continue
+
+            key = self._sensor_key('ipmitool', sensor['sid'], sensor['name'], sensor['eid'])
+            if key is not None:
+                temps[key] = int(sensor['reading'])
 
-            self._run_ipmitool('raw', '0x30', '0x30', '0x02', '0xff', format(speed, '02x'))
+    @staticmethod
+    def _automatic_cooling_args(enable: bool) -> tuple[str, ...]:
+        return ('raw', '0x30', '0x30', '0x01', '0x01' if enable else '0x00')
 
+    def use_automatic_cooling(self, enable: bool):
+        self._last_cooling_mode = None
+        self._run_ipmitool(*self._automatic_cooling_args(enable))
+        self._last_cooling_mode = 'auto' if enable else 'manual'
+        if enable:
+            self._last_commanded_speed = None
+
+    def set_fan_speed(self, speed: int, force_every: int = 10):
+        # nothing to do if the BMC already has this speed, but resync now and then
+        # in case it dropped back to automatic on its own
+        if (speed == self._last_commanded_speed
+                and self._last_cooling_mode == 'manual'
+                and self._skipped_speed_writes < force_every):
+            self._skipped_speed_writes += 1
+            return
+
+        # forget what the BMC has until this write goes through, so a failure is retried next tick
+        self._last_commanded_speed = None
+        self._last_cooling_mode = None
+
+        try:
+            # switch to manual control and set the speed in a single round trip
+            self._run_ipmitool_batch(
+                self._automatic_cooling_args(False),
+                ('raw', '0x30', '0x30', '0x02', '0xff', f'0x{speed:02x}')
+            )
+
+            self._last_cooling_mode = 'manual'
+            self._last_commanded_speed = speed
+            self._skipped_speed_writes = 0
             self.current_profile = f"User {speed}%"
         except Exception as e:
             self.console.print(f"[red]Error setting fan speed: {e}[/red]")
@@ -168,6 +491,11 @@ class DellServer:
             self.console.print(f"[red]Error setting Dell profile: {e}[/red]")
 
     def manage_pcie_cooling(self, enable: bool):
+        # the PCIe cooling command only exists on Gen 13 and older, don't guess
+        if self.is_gen14_or_newer is None:
+            self.console.print("[yellow]Warning: Server generation unknown, not changing PCIe cooling[/yellow]")
+            return
+
         if not self.is_gen14_or_newer:
             try:
                 self._run_ipmitool(
@@ -189,13 +517,13 @@ class DellServer:
             except Exception as e:
                 self.console.print(f"[red]Error managing PCIe cooling: {e}[/red]")
 
-    def get_fan_speeds(self) -> dict:
+    def _read_fan_speeds(self) -> dict:
         try:
             fan_data = self._run_ipmitool('sdr', 'type', 'fan')
             fan_speeds = {}
             for line in fan_data.splitlines():
                 if 'RPM' in line and 'Fan Redundancy' not in line:
-                    fan_match = re.match(r'Fan(\d+) RPM\s+\|\s+\w+\s+\|\s+\w+\s+\|\s+[\d.]+\s+\|\s+(\d+)', line)
+                    fan_match = _FAN_RE.match(line)
                     if fan_match:
                         fan_num = int(fan_match.group(1))
                         speed = int(fan_match.group(2))
@@ -219,35 +547,43 @@ class DellServer:
             self.console.print(f"[dim]Waiting {wait_time}s for fans to stabilize...[/dim]")
             time.sleep(wait_time)  # Wait for fans to stabilize
 
-            readings = []
-            self.console.print("[dim]Taking 3 readings with 1s intervals...[/dim]")
+            samples = 3
+            n = 0
+            mean = 0.0
+            low = high = None
+            self.console.print(f"[dim]Taking {samples} readings with 0.5s intervals...[/dim]")
 
-            for i in range(3):  # Take 3 readings
-                current_speeds = self.get_fan_speeds()
-                if current_speeds and 1 in current_speeds:
-                    fan1_speed = current_speeds[1]
-                    self.console.print(f"[dim]Reading {i+1}: Fan1 = {fan1_speed} RPM[/dim]")
-                    readings.append(fan1_speed)
-                else:
+            for i in range(samples):
+                if i:
+                    time.sleep(0.5)
+
+                current_speeds = self._read_fan_speeds()
+                if not current_speeds or 1 not in current_speeds:
                     self.console.print("[dim]Warning: Could not read Fan1 speed[/dim]")
-                time.sleep(1)
+                    self.console.print("[dim]Not enough valid readings[/dim]")
+                    return None
+
+                fan1_speed = current_speeds[1]
+                self.console.print(f"[dim]Reading {i+1}: Fan1 = {fan1_speed} RPM[/dim]")
+
+                # running mean and range, no need to keep the readings around
+                n += 1
+                mean += (fan1_speed - mean) / n
+                low = fan1_speed if low is None else min(low, fan1_speed)
+                high = fan1_speed if high is None else max(high, fan1_speed)
+
+                # once the spread is 10% of the highest reading, no mean can be within 5% of both ends
+                if low <= 0.9 * high:
+                    break
 
             # Check stability - allow for small variations (within 5%)
-            if len(readings) == 3:
-                avg_reading = sum(readings) / len(readings)
-                is_stable = all(abs(r - avg_reading) / avg_reading < 0.05 for r in readings)
+            max_deviation = max(high - mean, mean - low)
+            if n == samples and mean and max_deviation / mean < 0.05:
+                self.console.print(f"[dim]Readings are stable (average: {int(mean)} RPM)[/dim]")
+                return int(mean)
 
-                if is_stable:
-                    self.console.print(f"[dim]Readings are stable (average: {int(avg_reading)} RPM)[/dim]")
-                    return int(avg_reading)
-                else:
-                    self.console.print("[dim]Readings are not stable:[/dim]")
-                    for i, reading in enumerate(readings):
-                        self.console.print(f"[dim]  Reading {i+1}: {reading} RPM[/dim]")
-                    return None
-            else:
-                self.console.print("[dim]Not enough valid readings[/dim]")
-                return None
+            self.console.print(f"[dim]Readings are not stable (range: {low} - {high} RPM)[/dim]")
+            return None
 
         try:
             # Test minimum speed (0%)
@@ -302,87 +638,181 @@ class DellServer:
         percentage = ((rpm - min_rpm) / (max_rpm - min_rpm)) * 100
         return max(0, min(100, round(percentage)))
 
-    def create_table(self, temps: dict) -> Table:
-        table = Table(title="Dell iDRAC Fan Controller Status")
+    def is_cpu_hot(self, temp: Optional[float]) -> bool:
+        """Whether a CPU package temperature puts the junction over the threshold"""
+        return temp is not None and temp > self.adjusted_threshold
 
-        table.add_column("Time", justify="center")
-        table.add_column("Inlet Temp", justify="right")
-        table.add_column("CPU1 Temp", justify="right")
-        table.add_column("CPU2 Temp", justify="right")
-        table.add_column("Exhaust Temp", justify="right")
-        table.add_column("Fan Profile", justify="left")
-        table.add_column("Fan Speeds", justify="right")
+    def create_table(self, temps: dict, fan_speeds: dict) -> Table:
+        """Build the status table for the latest readings"""
+        table = Table(title="Dell iDRAC Fan Controller Status")
+        for header, justify in _TABLE_COLUMNS:
+            table.add_column(header, justify=justify)
 
-        def temp_color(temp: Optional[float]) -> Text:
+        def temp_color(temp: Optional[float], threshold: float, hot: bool) -> Text:
             if temp is None:
-                return Text("-", style="dim")
+                return Text("-", style=_STYLE_DIM)
             temp_text = f"{temp}°C"
-            if temp >= self.config.cpu_temp_threshold:
-                return Text(temp_text, style="bold red")
-            elif temp >= self.config.cpu_temp_threshold * 0.9:
-                return Text(temp_text, style="bold yellow")
-            return Text(temp_text, style="green")
-
-        fan_speeds = self.get_fan_speeds()
-
-        if fan_speeds:
-            speeds = []
-            for fan_num, rpm in sorted(fan_speeds.items()):
-                percentage = self.get_fan_percentage(rpm)
-                speeds.append(f"Fan{fan_num}: {rpm} RPM ({percentage}%)")
-            fan_text = "\n".join(speeds)
-        else:
-            fan_text = "No data"
+            if hot:
+                return Text(temp_text, style=_STYLE_HOT)
+            elif temp >= threshold * 0.9:
+                return Text(temp_text, style=_STYLE_WARM)
+            return Text(temp_text, style=_STYLE_OK)
+
+        def ambient_color(temp: Optional[float]) -> Text:
+            threshold = self.config.cpu_temp_threshold
+            return temp_color(temp, threshold, temp is not None and temp >= threshold)
+
+        def cpu_color(temp: Optional[float]) -> Text:
+            # same decision the main loop uses to switch to max fan speed
+            return temp_color(temp, self.adjusted_threshold, self.is_cpu_hot(temp))
+
+        fan_text = "\n".join(self._format_fan_speeds(fan_speeds)) or "No data"
 
         table.add_row(
             datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            temp_color(temps['inlet']),
-            temp_color(temps['cpu1']),
-            temp_color(temps['cpu2']),
-            temp_color(temps['exhaust']),
+            ambient_color(temps['inlet']),
+            cpu_color(temps['cpu1']),
+            cpu_color(temps['cpu2']),
+            ambient_color(temps['exhaust']),
             self.current_profile,
             fan_text
         )
 
         return table
 
+    def create_row(self, temps: dict, fan_speeds: dict) -> str:
+        """Plain one-line status for when there's no terminal to draw the table on"""
+        def temp_text(temp: Optional[float]) -> str:
+            return "-" if temp is None else f"{temp}°C"
+
+        fan_text = ", ".join(self._format_fan_speeds(fan_speeds)) or "No data"
+
+        return (
+            f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} "
+            f"inlet={temp_text(temps['inlet'])} "
+            f"cpu1={temp_text(temps['cpu1'])} "
+            f"cpu2={temp_text(temps['cpu2'])} "
+            f"exhaust={temp_text(temps['exhaust'])} "
+            f"profile={self.current_profile} "
+            f"fans={fan_text}"
+        )
+
+    def _format_fan_speeds(self, fan_speeds: dict) -> list[str]:
+        return [
+            f"Fan{fan_num}: {rpm} RPM ({self.get_fan_percentage(rpm)}%)"
+            for fan_num, rpm in sorted(fan_speeds.items())
+        ]
+
+def serve_status(path: str, get_status) -> socket.socket:
+    """
+    Answer every connection on a UNIX socket with the latest status as a single
+    JSON line, so the healthcheck never has to talk to the BMC itself.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    sock.listen()
+
+    def serve():
+        while True:
+            try:
+                conn, _ = sock.accept()
+            except OSError:
+                return  # socket was closed on shutdown
+
+            with conn:
+                try:
+                    conn.sendall(f"{json.dumps(get_status())}\n".encode())
+                except OSError:
+                    pass
+
+    threading.Thread(target=serve, daemon=True).start()
+    return sock
+
 def main():
-    config = ServerConfig()
+    config = ServerConfig.from_env()
     server = DellServer(config)
+    stop = threading.Event()
 
-    def graceful_exit(signum, frame):
-        server.console.print("\n[yellow]Shutting down, restoring Dell profile[/yellow]")
-        server.set_dell_profile()
-        if not config.keep_pcie_state:
-            server.manage_pcie_cooling(True)
-        sys.exit(0)
+    def request_exit(signum, frame):
+        stop.set()
 
-    signal.signal(signal.SIGINT, graceful_exit)
-    signal.signal(signal.SIGTERM, graceful_exit)
+    signal.signal(signal.SIGINT, request_exit)
+    signal.signal(signal.SIGTERM, request_exit)
 
     if config.disable_pcie_cooling:
         server.manage_pcie_cooling(False)
 
-    with Live(
-        server.create_table(server.get_temperatures()),
-        refresh_per_second=1,
-        console=server.console
-    ) as live:
-        while True:
+    status = None
+    try:
+        status_sock = serve_status(config.status_socket, lambda: status)
+    except OSError as e:
+        status_sock = None
+        server.console.print(f"[yellow]Warning: Could not open status socket: {e}[/yellow]")
+
+    # never poll more than once a second, a zero interval would just spin on stop.wait()
+    interval = max(1, config.check_interval)
+    interval_min = max(1, min(config.check_interval_min, interval))
+    interval_max = max(config.check_interval_max, interval)
+
+    # only draw the live table for a real terminal, docker logs and journald just get a line per tick
+    if server.console.is_terminal:
+        display = Live(
+            server.create_table(server.get_temperatures(), server.get_fan_speeds()),
+            # we hand over a new table every tick, so only redraw when we ask for it
+            auto_refresh=False,
+            console=server.console
+        )
+
+        def show(temps: dict, fan_speeds: dict):
+            display.update(server.create_table(temps, fan_speeds), refresh=True)
+    else:
+        display = contextlib.nullcontext()
+
+        def show(temps: dict, fan_speeds: dict):
+            print(server.create_row(temps, fan_speeds), flush=True)
+
+    with display:
+        while not stop.is_set():
             temps = server.get_temperatures()
             fan_speeds = server.get_fan_speeds()
-            adjusted_threshold = config.cpu_temp_threshold - config.junction_offset
 
-            if config.enable_dynamic_updates and (
-                (temps['cpu1'] and temps['cpu1'] > adjusted_threshold) or \
-                (temps['cpu2'] and temps['cpu2'] > adjusted_threshold)
-            ):
+            cpu_temps = [t for t in (temps['cpu1'], temps['cpu2']) if t]
+            hottest_cpu = max(cpu_temps, default=None)
+
+            if config.enable_dynamic_updates and server.is_cpu_hot(hottest_cpu):
                 server.set_fan_speed(config.fan_speed_max)
             else:
                 server.set_fan_speed(config.fan_speed)
 
-            live.update(server.create_table(temps))
-            time.sleep(config.check_interval)
+            show(temps, fan_speeds)
+            status = {'ts': time.time(), 'temps': temps, 'fans': fan_speeds}
+
+            # back off while the CPUs are well below the threshold and poll faster once they're hot
+            # (or unreadable), in between keep the current pace so we don't flap around the band
+            if hottest_cpu is None or server.is_cpu_hot(hottest_cpu):
+                interval = max(interval_min, interval // 2)
+            elif hottest_cpu < 0.8 * server.adjusted_threshold:
+                interval = min(interval_max, interval * 2)
+
+            stop.wait(interval)
+            server.invalidate_cache()
+
+    server.console.print("\n[yellow]Shutting down, restoring Dell profile[/yellow]")
+    if status_sock is not None:
+        status_sock.close()
+        try:
+            os.remove(config.status_socket)
+        except OSError:
+            pass
+    server.set_dell_profile()
+    if not config.keep_pcie_state:
+        server.manage_pcie_cooling(True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file